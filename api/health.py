@@ -1,19 +1,26 @@
 """
 Vercel Serverless Function: GET /api/health
 """
-import json
 from http.server import BaseHTTPRequestHandler
 
+import orjson
+
+# The payload never changes, so build the body and its length once per
+# cold start instead of on every probe.
+_HEALTH_BODY = orjson.dumps({"status": "ok", "service": "Flowers Forever API"})
+_HEALTH_LEN  = str(len(_HEALTH_BODY))
+_HEALTH_TAIL = b"\r\n" + _HEALTH_BODY
+
 
 class handler(BaseHTTPRequestHandler):
 
     def do_GET(self):
-        body = json.dumps({"status": "ok", "service": "Flowers Forever API"}).encode()
         self.send_response(200)
         self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        self.send_header("Content-Length", _HEALTH_LEN)
+        # Send headers and body in one write rather than end_headers() + wfile.write().
+        self._headers_buffer.append(_HEALTH_TAIL)
+        self.flush_headers()
 
     def log_message(self, format, *args):
         pass
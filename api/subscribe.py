@@ -3,13 +3,15 @@ Vercel Serverless Function: POST /api/subscribe
 Creates a Recurly account + subscription from the Recurly.js token.
 """
 
-import json
 import logging
 import os
 import re
+import sys
 from datetime import datetime, timezone
+from functools import lru_cache
 from http.server import BaseHTTPRequestHandler
 
+import orjson
 import recurly
 import recurly.errors
 from recurly.base_errors import ApiError as RecurlyApiError
@@ -17,7 +19,7 @@ from recurly.base_errors import ApiError as RecurlyApiError
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-VALID_PLAN_CODES = {
+VALID_PLAN_CODES = frozenset(map(sys.intern, (
     "5daysub",
     "classic-monthly",
     "premium-monthly",
@@ -28,63 +30,97 @@ VALID_PLAN_CODES = {
     "tropical-monthly",
     "petsafe-monthly",
     "plants-monthly",
-}
+)))
 
-US_STATES = {
+US_STATES = frozenset(map(sys.intern, (
     "AL","AK","AZ","AR","CA","CO","CT","DE","FL","GA",
     "HI","ID","IL","IN","IA","KS","KY","LA","ME","MD",
     "MA","MI","MN","MS","MO","MT","NE","NV","NH","NJ",
     "NM","NY","NC","ND","OH","OK","OR","PA","RI","SC",
     "SD","TN","TX","UT","VT","VA","WA","WV","WI","WY",
-}
+)))
 
+_ACCOUNT_RE = re.compile(r"[^a-z0-9._-]")
+
+# A checkout payload is well under 2 KB; anything past this is refused unread.
+_MAX_BODY = 64 * 1024
 
-def _get_client():
-    api_key = os.environ.get("RECURLY_PRIVATE_API_KEY", "")
-    if not api_key:
-        return None
-    return recurly.Client(api_key)
 
+# Created once per warm instance so repeat invocations reuse the SDK's
+# connection instead of building a new client on every POST.
+_API_KEY = os.environ.get("RECURLY_PRIVATE_API_KEY", "")
+_CLIENT  = recurly.Client(_API_KEY) if _API_KEY else None
 
+
+@lru_cache(maxsize=1024)
 def _account_code_from_email(email: str) -> str:
-    safe = re.sub(r"[^a-z0-9._-]", "-", email.lower())
+    safe = _ACCOUNT_RE.sub("-", email.lower())
     return safe[:50]
 
 
+def _parse_ymd(s):
+    """Parse a YYYY-MM-DD string as midnight UTC; None if malformed."""
+    if not isinstance(s, str) or len(s) != 10 or s[4] != "-" or s[7] != "-":
+        return None
+    digits = s[0:4] + s[5:7] + s[8:10]
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    try:
+        return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), tzinfo=timezone.utc)
+    except ValueError:  # out-of-range day/month, e.g. 2025-02-30
+        return None
+
+
+def _valid_email(s: str) -> bool:
+    """Exactly one '@', non-empty local part, a dot inside the domain, no whitespace."""
+    at = s.find("@")
+    if at <= 0 or s.find("@", at + 1) != -1:
+        return False
+    dot = s.find(".", at + 2)
+    return dot != -1 and dot < len(s) - 1 and not any(c.isspace() for c in s)
+
+
 def _validate(data):
+    if not isinstance(data, dict):
+        return ["Request body must be a JSON object."]
     errors = []
     for key in ("recurly_token", "plan_code", "first_name", "last_name", "email"):
-        if not isinstance(data.get(key, ""), str) or not data.get(key, "").strip():
+        v = data.get(key, "")
+        if not isinstance(v, str) or not v.strip():
             errors.append(f"'{key}' is required.")
+    # Format checks only run on values that passed the cheap type check above.
     email = data.get("email", "")
-    if email and not re.match(r"^[^\s@]+@[^\s@]+\.[^\s@]+$", email):
+    if email and isinstance(email, str) and not _valid_email(email):
         errors.append("'email' is not a valid email address.")
     plan_code = data.get("plan_code", "")
-    if plan_code and plan_code not in VALID_PLAN_CODES:
+    if plan_code and isinstance(plan_code, str) and plan_code not in VALID_PLAN_CODES:
         errors.append(f"'plan_code' '{plan_code}' is not a recognised plan.")
     address = data.get("address")
     if not isinstance(address, dict):
         errors.append("'address' must be an object.")
-    else:
-        for key in ("address1", "city", "state", "zip"):
-            if not isinstance(address.get(key, ""), str) or not address.get(key, "").strip():
-                errors.append(f"'address.{key}' is required.")
-        state = address.get("state", "")
-        if state and state.upper() not in US_STATES:
-            errors.append(f"'address.state' '{state}' is not a valid US state.")
-        zip_code = address.get("zip", "")
-        if zip_code and not re.match(r"^\d{5}$", str(zip_code)):
-            errors.append("'address.zip' must be a 5-digit US ZIP code.")
+        return errors
+    for key in ("address1", "city", "state", "zip"):
+        v = address.get(key, "")
+        if not isinstance(v, str) or not v.strip():
+            errors.append(f"'address.{key}' is required.")
+    state = address.get("state", "")
+    if state and isinstance(state, str) and state not in US_STATES and state.upper() not in US_STATES:
+        errors.append(f"'address.state' '{state}' is not a valid US state.")
+    zip_code = address.get("zip", "")
+    if zip_code and not (isinstance(zip_code, str) and len(zip_code) == 5 and zip_code.isdecimal()):
+        errors.append("'address.zip' must be a 5-digit US ZIP code.")
     return errors
 
 
-def _cors_headers():
-    return {
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "POST, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Content-Type": "application/json",
-    }
+_CORS = (
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Methods", "POST, OPTIONS"),
+    ("Access-Control-Allow-Headers", "Content-Type"),
+    ("Content-Type", "application/json"),
+)
+
+# The same headers pre-encoded as raw header lines, written in one piece.
+_CORS_BLOB = b"".join(b"%s: %s\r\n" % (k.encode("latin-1"), v.encode("latin-1")) for k, v in _CORS)
 
 
 def _extract_3ds_token(exc):
@@ -140,33 +176,41 @@ def _extract_3ds_token(exc):
 
 
 def _respond(handler, status, body):
-    encoded = json.dumps(body).encode()
+    encoded = orjson.dumps(body)
     handler.send_response(status)
-    for k, v in _cors_headers().items():
-        handler.send_header(k, v)
-    handler.send_header("Content-Length", str(len(encoded)))
-    handler.end_headers()
-    handler.wfile.write(encoded)
+    # end_headers() flushes the header block and the body would follow as a
+    # second socket write; queue the CORS block, length, blank line and body
+    # behind the status line so the whole response leaves in a single write.
+    handler._headers_buffer.append(
+        _CORS_BLOB + b"Content-Length: %d\r\n\r\n%s" % (len(encoded), encoded)
+    )
+    handler.flush_headers()
 
 
 class handler(BaseHTTPRequestHandler):
 
     def do_OPTIONS(self):
         self.send_response(204)
-        for k, v in _cors_headers().items():
-            self.send_header(k, v)
-        self.end_headers()
+        self._headers_buffer.append(_CORS_BLOB + b"\r\n")
+        self.flush_headers()
 
     def do_POST(self):
-        client = _get_client()
+        client = _CLIENT
         if client is None:
             return _respond(self, 503, {"success": False, "message": "Recurly API key not configured."})
 
-        length = int(self.headers.get("Content-Length", 0))
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = 0
+        if length <= 0:
+            return _respond(self, 400, {"success": False, "message": "Request body must be JSON."})
+        if length > _MAX_BODY:
+            return _respond(self, 413, {"success": False, "message": "Request body too large."})
         raw = self.rfile.read(length)
         try:
-            data = json.loads(raw)
-        except (json.JSONDecodeError, ValueError):
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
             return _respond(self, 400, {"success": False, "message": "Request body must be JSON."})
 
         errors = _validate(data)
@@ -206,11 +250,9 @@ class handler(BaseHTTPRequestHandler):
 
         start_date = data.get("start_date", "asap")
         if start_date and start_date != "asap":
-            try:
-                dt = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            dt = _parse_ymd(start_date)
+            if dt is not None:
                 subscription_body["starts_at"] = dt.isoformat()
-            except ValueError:
-                pass
 
         coupon_code = data.get("coupon_code")
         if coupon_code:
@@ -7,17 +7,23 @@ in this version of the library.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import recurly.errors
 from recurly.base_errors import ApiError as RecurlyApiError
 from flask import Blueprint, jsonify, request
 
+from utils.json_provider import json_response
 from utils.recurly_client import client
 
 logger = logging.getLogger(__name__)
 
 account_bp = Blueprint("account", __name__)
 
+# Runs independent Recurly lookups alongside the request thread. Safe because
+# utils.recurly_client gives every thread its own client connection.
+_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="recurly")
+
 
 # -----------------------------------------------------------------------
 # Auth stub — replace with real session / JWT verification
@@ -40,25 +46,21 @@ def _auth_required(f):
 # -----------------------------------------------------------------------
 
 def _serialize_subscription(sub) -> dict:
+    # Datetimes are left as-is — the app's orjson provider serialises them.
+    plan = sub.plan
     return {
         "id":    sub.id,
         "uuid":  sub.uuid,
         "state": sub.state,
-        "plan_code": sub.plan.code if sub.plan else None,
-        "plan_name": sub.plan.name if sub.plan else None,
+        "plan_code": plan.code if plan else None,
+        "plan_name": plan.name if plan else None,
         "unit_amount": sub.unit_amount,
         "currency":    sub.currency,
-        "current_period_started_at": (
-            sub.current_period_started_at.isoformat()
-            if sub.current_period_started_at else None
-        ),
-        "current_period_ends_at": (
-            sub.current_period_ends_at.isoformat()
-            if sub.current_period_ends_at else None
-        ),
-        "activated_at": sub.activated_at.isoformat() if sub.activated_at else None,
-        "expires_at":   sub.expires_at.isoformat()   if sub.expires_at   else None,
-        "paused_at":    sub.paused_at.isoformat()    if sub.paused_at    else None,
+        "current_period_started_at": sub.current_period_started_at,
+        "current_period_ends_at":    sub.current_period_ends_at,
+        "activated_at": sub.activated_at,
+        "expires_at":   sub.expires_at,
+        "paused_at":    sub.paused_at,
     }
 
 
@@ -69,8 +71,8 @@ def _serialize_invoice(inv) -> dict:
         "state":    inv.state,
         "total":    inv.total,
         "currency": inv.currency,
-        "due_on":   inv.due_on.isoformat()   if inv.due_on   else None,
-        "closed_at": inv.closed_at.isoformat() if inv.closed_at else None,
+        "due_on":   inv.due_on,
+        "closed_at": inv.closed_at,
     }
 
 
@@ -80,9 +82,7 @@ def _get_active_subscription(account_code: str):
         f"code-{account_code}",
         params={"state": "active", "limit": 1},
     )
-    for sub in subs.items():
-        return sub
-    return None
+    return next(iter(subs.items()), None)
 
 
 # -----------------------------------------------------------------------
@@ -95,8 +95,10 @@ def get_account(account_code: str):
     if client is None:
         return jsonify({"success": False, "message": "Recurly not configured"}), 503
     try:
+        # The two lookups are independent — overlap their round-trips.
+        f_sub      = _POOL.submit(_get_active_subscription, account_code)
         account    = client.get_account(f"code-{account_code}")
-        active_sub = _get_active_subscription(account_code)
+        active_sub = f_sub.result()
         return jsonify({
             "success": True,
             "account": {
@@ -104,7 +106,7 @@ def get_account(account_code: str):
                 "email":      account.email,
                 "first_name": account.first_name,
                 "last_name":  account.last_name,
-                "created_at": account.created_at.isoformat() if account.created_at else None,
+                "created_at": account.created_at,
             },
             "active_subscription": _serialize_subscription(active_sub) if active_sub else None,
         })
@@ -128,7 +130,7 @@ def list_subscriptions(account_code: str):
         subs = client.list_account_subscriptions(
             f"code-{account_code}", params={"limit": 20}
         )
-        return jsonify({
+        return json_response({
             "success": True,
             "subscriptions": [_serialize_subscription(s) for s in subs.items()],
         })
@@ -306,7 +308,7 @@ def list_invoices(account_code: str):
         invoices = client.list_account_invoices(
             f"code-{account_code}", params={"limit": 20}
         )
-        return jsonify({
+        return json_response({
             "success": True,
             "invoices": [_serialize_invoice(inv) for inv in invoices.items()],
         })
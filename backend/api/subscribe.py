@@ -11,6 +11,7 @@ classes in this version. Every body is just a dict matching the schema.
 import logging
 import re
 from datetime import datetime, timezone
+from functools import lru_cache
 
 import recurly.errors
 from recurly.base_errors import ApiError as RecurlyApiError
@@ -23,6 +24,8 @@ logger = logging.getLogger(__name__)
 
 subscribe_bp = Blueprint("subscribe", __name__)
 
+_ACCOUNT_RE = re.compile(r"[^a-z0-9._-]")
+
 
 def _extract_3ds_token(exc):
     """
@@ -66,12 +69,26 @@ def _extract_3ds_token(exc):
     return None
 
 
+@lru_cache(maxsize=1024)
 def _account_code_from_email(email: str) -> str:
     """Derive a stable, URL-safe Recurly account code from an email address."""
-    safe = re.sub(r"[^a-z0-9._-]", "-", email.lower())
+    safe = _ACCOUNT_RE.sub("-", email.lower())
     return safe[:50]
 
 
+def _parse_ymd(s):
+    """Parse a YYYY-MM-DD string as midnight UTC; None if malformed."""
+    if not isinstance(s, str) or len(s) != 10 or s[4] != "-" or s[7] != "-":
+        return None
+    digits = s[0:4] + s[5:7] + s[8:10]
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    try:
+        return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), tzinfo=timezone.utc)
+    except ValueError:  # out-of-range day/month, e.g. 2025-02-30
+        return None
+
+
 @subscribe_bp.post("/subscribe")
 def create_subscription():
     """
@@ -149,10 +166,10 @@ def create_subscription():
     # Optional: specific start date
     start_date = data.get("start_date", "asap")
     if start_date and start_date != "asap":
-        try:
-            dt = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        dt = _parse_ymd(start_date)
+        if dt is not None:
             subscription_body["starts_at"] = dt.isoformat()
-        except ValueError:
+        else:
             logger.warning("Invalid start_date '%s', defaulting to immediate.", start_date)
 
     # Optional: coupon code
@@ -176,10 +193,7 @@ def create_subscription():
             "subscription_id": subscription.id,
             "account_code":    subscription.account.code,
             "state":           subscription.state,
-            "current_period_ends_at": (
-                subscription.current_period_ends_at.isoformat()
-                if subscription.current_period_ends_at else None
-            ),
+            "current_period_ends_at": subscription.current_period_ends_at,
         }), 201
 
     except (recurly.errors.ValidationError, recurly.errors.TransactionError) as e:
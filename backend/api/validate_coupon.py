@@ -11,7 +11,7 @@ import recurly
 import recurly.errors
 from flask import Blueprint, jsonify, request
 
-from ..utils.recurly_client import get_client
+from utils.recurly_client import client
 
 logger = logging.getLogger(__name__)
 
@@ -62,7 +62,6 @@ def validate_coupon():
     if not coupon_code:
         return jsonify({"valid": False, "message": "coupon_code is required."}), 400
 
-    client = get_client()
     if client is None:
         return jsonify({"valid": False, "message": "Recurly API key not configured."}), 503
 
@@ -26,14 +26,38 @@ Supported events handled here:
   - new_invoice_notification
 """
 
+import base64
 import hashlib
 import hmac
 import logging
 import os
-import xml.etree.ElementTree as ET
+import queue
+import re
+import threading
 from functools import wraps
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
+
+from utils.json_provider import json_response
+
+
+class DTDForbidden(ValueError):
+    """Payload carries a DOCTYPE. Recurly never sends one, and an internal
+    subset is how entity-expansion (billion laughs) and XXE payloads get in."""
+
+
+try:
+    from lxml import etree as ET
+    # Built once and reused. No external DTD loading, no entity
+    # substitution, no network fetches, libxml2's default size limits.
+    _PARSER   = ET.XMLParser(
+        resolve_entities=False, no_network=True, huge_tree=False, load_dtd=False,
+    )
+    _XMLError = (ET.XMLSyntaxError, DTDForbidden)
+except ImportError:  # dev fallback when lxml isn't installed
+    import xml.etree.ElementTree as ET
+    _PARSER   = None
+    _XMLError = (ET.ParseError, DTDForbidden)
 
 logger = logging.getLogger(__name__)
 
@@ -43,27 +67,41 @@ webhooks_bp = Blueprint("webhooks", __name__)
 # Auth helpers
 # -----------------------------------------------------------------------
 
+# Read once at import — app.py loads .env before importing the blueprints.
+# Kept as bytes so compare_digest never has to re-encode (and works on
+# non-ASCII input, which str comparison rejects).
+_EXPECTED_USER   = os.environ.get("RECURLY_WEBHOOK_USER", "recurly").encode()
+_EXPECTED_SECRET = os.environ.get("RECURLY_WEBHOOK_SECRET", "").encode()
+_DEV_MODE        = os.environ.get("FLASK_ENV") == "development"
+
+
 def _check_basic_auth(f):
     """Decorator: verify HTTP Basic Auth credentials on the webhook endpoint."""
     @wraps(f)
     def wrapper(*args, **kwargs):
-        expected_user   = os.environ.get("RECURLY_WEBHOOK_USER", "recurly")
-        expected_secret = os.environ.get("RECURLY_WEBHOOK_SECRET", "")
-
-        if not expected_secret:
+        if not _EXPECTED_SECRET:
             # No secret configured — skip auth in development only
-            if os.environ.get("FLASK_ENV") == "development":
+            if _DEV_MODE:
                 logger.warning("RECURLY_WEBHOOK_SECRET not set — skipping auth (dev mode).")
                 return f(*args, **kwargs)
-            return jsonify({"error": "Webhook auth not configured"}), 503
-
-        auth = request.authorization
-        if not auth:
+            return json_response({"error": "Webhook auth not configured"}, 503)
+
+        # Decode "Authorization: Basic <b64>" ourselves and compare raw bytes,
+        # rather than building Werkzeug's general-purpose Authorization object.
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        creds = b""
+        if scheme.lower() == "basic":
+            try:
+                creds = base64.b64decode(token.strip(), validate=True)
+            except ValueError:  # includes binascii.Error
+                pass
+        if b":" not in creds:
             return ("Unauthorized", 401, {"WWW-Authenticate": 'Basic realm="Recurly"'})
+        user, _, secret = creds.partition(b":")
 
         # Constant-time comparison to avoid timing attacks
-        user_ok   = hmac.compare_digest(auth.username or "", expected_user)
-        secret_ok = hmac.compare_digest(auth.password or "", expected_secret)
+        user_ok   = hmac.compare_digest(user, _EXPECTED_USER)
+        secret_ok = hmac.compare_digest(secret, _EXPECTED_SECRET)
 
         if not (user_ok and secret_ok):
             logger.warning("Webhook auth failure from %s", request.remote_addr)
@@ -79,14 +117,21 @@ def _check_basic_auth(f):
 
 def _text(node, *path: str, default: str = "") -> str:
     """Safely extract text from a nested XML path."""
-    current = node
-    for tag in path:
-        if current is None:
-            return default
-        current = current.find(tag)
-    if current is None or current.text is None:
-        return default
-    return current.text.strip()
+    # One findtext() over the joined path; ElementPath caches the compiled
+    # path, so there is no per-component find() walk.
+    text = node.findtext("/".join(path))
+    return text.strip() if text else default
+
+
+# Root element name, read straight off the raw bytes (optional BOM and XML
+# declaration first). Lets us skip parsing events we don't handle at all.
+_ROOT_TAG_RE = re.compile(rb"(?:\xef\xbb\xbf)?\s*(?:<\?xml[^>]*\?>\s*)?<([A-Za-z_][\w.-]*)")
+
+
+def _peek_event_type(xml_body: bytes) -> str | None:
+    """Return the root tag without parsing, or None if it can't be read cheaply."""
+    m = _ROOT_TAG_RE.match(xml_body)
+    return m.group(1).decode("ascii") if m else None
 
 
 def _parse_payload(xml_body: bytes) -> tuple[str, ET.Element]:
@@ -95,7 +140,14 @@ def _parse_payload(xml_body: bytes) -> tuple[str, ET.Element]:
     Returns (event_type, root_element).
     The root tag IS the event type, e.g. 'new_subscription_notification'.
     """
-    root = ET.fromstring(xml_body)
+    if b"<!DOCTYPE" in xml_body:
+        raise DTDForbidden("DOCTYPE declarations are not accepted")
+    root = ET.fromstring(xml_body, _PARSER)
+    # resolve_entities=False keeps entity references as nodes, but XPath
+    # string() still expands them — so refuse any internal subset. This also
+    # catches non-UTF-8 bodies that the byte check above can't see.
+    if _PARSER is not None and root.getroottree().docinfo.internalDTD is not None:
+        raise DTDForbidden("DOCTYPE declarations are not accepted")
     return root.tag, root
 
 
@@ -103,11 +155,11 @@ def _parse_payload(xml_body: bytes) -> tuple[str, ET.Element]:
 # Event handlers
 # -----------------------------------------------------------------------
 
-def _handle_new_subscription(root: ET.Element) -> None:
-    account_code = _text(root, "account", "account_code")
-    email        = _text(root, "account", "email")
-    plan_code    = _text(root, "subscription", "plan", "plan_code")
-    sub_uuid     = _text(root, "subscription", "uuid")
+def _handle_new_subscription(fields: dict[str, str]) -> None:
+    account_code = fields["account_code"]
+    email        = fields["email"]
+    plan_code    = fields["plan_code"]
+    sub_uuid     = fields["sub_uuid"]
 
     logger.info(
         "NEW SUBSCRIPTION: account=%s email=%s plan=%s sub=%s",
@@ -116,10 +168,10 @@ def _handle_new_subscription(root: ET.Element) -> None:
     # TODO: send welcome email, provision delivery schedule, etc.
 
 
-def _handle_canceled_subscription(root: ET.Element) -> None:
-    account_code = _text(root, "account", "account_code")
-    sub_uuid     = _text(root, "subscription", "uuid")
-    expires_at   = _text(root, "subscription", "expires_at")
+def _handle_canceled_subscription(fields: dict[str, str]) -> None:
+    account_code = fields["account_code"]
+    sub_uuid     = fields["sub_uuid"]
+    expires_at   = fields["expires_at"]
 
     logger.info(
         "CANCELED SUBSCRIPTION: account=%s sub=%s expires=%s",
@@ -128,10 +180,10 @@ def _handle_canceled_subscription(root: ET.Element) -> None:
     # TODO: send cancellation confirmation email, schedule offboarding
 
 
-def _handle_updated_subscription(root: ET.Element) -> None:
-    account_code = _text(root, "account", "account_code")
-    new_plan     = _text(root, "subscription", "plan", "plan_code")
-    sub_uuid     = _text(root, "subscription", "uuid")
+def _handle_updated_subscription(fields: dict[str, str]) -> None:
+    account_code = fields["account_code"]
+    new_plan     = fields["new_plan"]
+    sub_uuid     = fields["sub_uuid"]
 
     logger.info(
         "UPDATED SUBSCRIPTION: account=%s sub=%s new_plan=%s",
@@ -140,48 +192,49 @@ def _handle_updated_subscription(root: ET.Element) -> None:
     # TODO: update internal plan tracking, send confirmation email
 
 
-def _handle_expired_subscription(root: ET.Element) -> None:
-    account_code = _text(root, "account", "account_code")
-    sub_uuid     = _text(root, "subscription", "uuid")
+def _handle_expired_subscription(fields: dict[str, str]) -> None:
+    account_code = fields["account_code"]
+    sub_uuid     = fields["sub_uuid"]
 
     logger.info("EXPIRED SUBSCRIPTION: account=%s sub=%s", account_code, sub_uuid)
     # TODO: trigger win-back email campaign
 
 
-def _handle_renewed_subscription(root: ET.Element) -> None:
-    account_code = _text(root, "account", "account_code")
-    sub_uuid     = _text(root, "subscription", "uuid")
-    next_renewal = _text(root, "subscription", "current_period_ends_at")
+def _handle_renewed_subscription(fields: dict[str, str]) -> None:
+    account_code = fields["account_code"]
+    sub_uuid     = fields["sub_uuid"]
+    next_renewal = fields["next_renewal"]
 
-    logger.info(
-        "RENEWED SUBSCRIPTION: account=%s sub=%s next=%s",
-        account_code, sub_uuid, next_renewal,
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "RENEWED SUBSCRIPTION: account=%s sub=%s next=%s",
+            account_code, sub_uuid, next_renewal,
+        )
     # TODO: send "your next bouquet is on its way" email
 
 
-def _handle_reactivated_subscription(root: ET.Element) -> None:
-    account_code = _text(root, "account", "account_code")
-    sub_uuid     = _text(root, "subscription", "uuid")
+def _handle_reactivated_subscription(fields: dict[str, str]) -> None:
+    account_code = fields["account_code"]
+    sub_uuid     = fields["sub_uuid"]
 
     logger.info("REACTIVATED SUBSCRIPTION: account=%s sub=%s", account_code, sub_uuid)
     # TODO: send welcome-back email
 
 
-def _handle_billing_info_updated(root: ET.Element) -> None:
-    account_code = _text(root, "account", "account_code")
-    email        = _text(root, "account", "email")
+def _handle_billing_info_updated(fields: dict[str, str]) -> None:
+    account_code = fields["account_code"]
+    email        = fields["email"]
 
     logger.info("BILLING INFO UPDATED: account=%s email=%s", account_code, email)
     # TODO: send payment method updated confirmation email
 
 
-def _handle_failed_payment(root: ET.Element) -> None:
-    account_code   = _text(root, "account", "account_code")
-    email          = _text(root, "account", "email")
-    invoice_number = _text(root, "invoice", "invoice_number")
-    amount_due     = _text(root, "invoice", "balance_in_cents")
-    error_msg      = _text(root, "transaction", "message")
+def _handle_failed_payment(fields: dict[str, str]) -> None:
+    account_code   = fields["account_code"]
+    email          = fields["email"]
+    invoice_number = fields["invoice_number"]
+    amount_due     = fields["amount_due"]
+    error_msg      = fields["error_msg"]
 
     logger.warning(
         "FAILED PAYMENT: account=%s email=%s invoice=%s amount_cents=%s error=%s",
@@ -190,22 +243,23 @@ def _handle_failed_payment(root: ET.Element) -> None:
     # TODO: send payment failure email with retry link
 
 
-def _handle_successful_payment(root: ET.Element) -> None:
-    account_code   = _text(root, "account", "account_code")
-    invoice_number = _text(root, "invoice", "invoice_number")
-    amount_cents   = _text(root, "transaction", "amount_in_cents")
+def _handle_successful_payment(fields: dict[str, str]) -> None:
+    account_code   = fields["account_code"]
+    invoice_number = fields["invoice_number"]
+    amount_cents   = fields["amount_cents"]
 
-    logger.info(
-        "SUCCESSFUL PAYMENT: account=%s invoice=%s amount_cents=%s",
-        account_code, invoice_number, amount_cents,
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "SUCCESSFUL PAYMENT: account=%s invoice=%s amount_cents=%s",
+            account_code, invoice_number, amount_cents,
+        )
     # TODO: store payment record, trigger shipment if applicable
 
 
-def _handle_new_invoice(root: ET.Element) -> None:
-    account_code   = _text(root, "account", "account_code")
-    invoice_number = _text(root, "invoice", "invoice_number")
-    state          = _text(root, "invoice", "state")
+def _handle_new_invoice(fields: dict[str, str]) -> None:
+    account_code   = fields["account_code"]
+    invoice_number = fields["invoice_number"]
+    state          = fields["state"]
 
     logger.info(
         "NEW INVOICE: account=%s invoice=%s state=%s",
@@ -218,6 +272,78 @@ def _handle_new_invoice(root: ET.Element) -> None:
 # Dispatcher
 # -----------------------------------------------------------------------
 
+# Payload fields each handler reads, as paths below the root element.
+_FIELDS: dict[str, dict[str, tuple[str, ...]]] = {
+    "new_subscription_notification": {
+        "account_code": ("account", "account_code"),
+        "email":        ("account", "email"),
+        "plan_code":    ("subscription", "plan", "plan_code"),
+        "sub_uuid":     ("subscription", "uuid"),
+    },
+    "updated_subscription_notification": {
+        "account_code": ("account", "account_code"),
+        "new_plan":     ("subscription", "plan", "plan_code"),
+        "sub_uuid":     ("subscription", "uuid"),
+    },
+    "canceled_subscription_notification": {
+        "account_code": ("account", "account_code"),
+        "sub_uuid":     ("subscription", "uuid"),
+        "expires_at":   ("subscription", "expires_at"),
+    },
+    "expired_subscription_notification": {
+        "account_code": ("account", "account_code"),
+        "sub_uuid":     ("subscription", "uuid"),
+    },
+    "renewed_subscription_notification": {
+        "account_code": ("account", "account_code"),
+        "sub_uuid":     ("subscription", "uuid"),
+        "next_renewal": ("subscription", "current_period_ends_at"),
+    },
+    "reactivated_subscription_notification": {
+        "account_code": ("account", "account_code"),
+        "sub_uuid":     ("subscription", "uuid"),
+    },
+    "billing_info_updated_notification": {
+        "account_code": ("account", "account_code"),
+        "email":        ("account", "email"),
+    },
+    "failed_payment_notification": {
+        "account_code":   ("account", "account_code"),
+        "email":          ("account", "email"),
+        "invoice_number": ("invoice", "invoice_number"),
+        "amount_due":     ("invoice", "balance_in_cents"),
+        "error_msg":      ("transaction", "message"),
+    },
+    "successful_payment_notification": {
+        "account_code":   ("account", "account_code"),
+        "invoice_number": ("invoice", "invoice_number"),
+        "amount_cents":   ("transaction", "amount_in_cents"),
+    },
+    "new_invoice_notification": {
+        "account_code":   ("account", "account_code"),
+        "invoice_number": ("invoice", "invoice_number"),
+        "state":          ("invoice", "state"),
+    },
+}
+
+if _PARSER is not None:
+    # lxml: one precompiled XPath per field, evaluated in C.
+    _XPATHS = {
+        event: tuple(
+            (name, ET.XPath(f"string({'/'.join(path)})"))
+            for name, path in paths.items()
+        )
+        for event, paths in _FIELDS.items()
+    }
+
+
+def _extract(event_type: str, root: ET.Element) -> dict[str, str]:
+    """Pull every field the event's handler needs out of the payload."""
+    if _PARSER is not None:
+        return {name: xp(root).strip() for name, xp in _XPATHS[event_type]}
+    return {name: _text(root, *path) for name, path in _FIELDS[event_type].items()}
+
+
 _HANDLERS = {
     "new_subscription_notification":          _handle_new_subscription,
     "updated_subscription_notification":      _handle_updated_subscription,
@@ -232,6 +358,44 @@ _HANDLERS = {
 }
 
 
+# -----------------------------------------------------------------------
+# Background worker
+# -----------------------------------------------------------------------
+# Handlers run off the request thread so the ack to Recurly doesn't wait on
+# them. The queue is in-process and bounded: events still queued when the
+# process exits are lost, and when it is full new events are dropped with
+# an error log rather than blocking the request.
+
+_QUEUE: queue.Queue = queue.Queue(maxsize=int(os.environ.get("WEBHOOK_QUEUE_SIZE", 1000)))
+_worker_lock = threading.Lock()
+_worker: threading.Thread | None = None
+
+
+def _drain() -> None:
+    while True:
+        event_type, handler, fields = _QUEUE.get()
+        try:
+            handler(fields)
+        except Exception as e:
+            logger.error("Error in webhook handler for '%s': %s", event_type, e, exc_info=True)
+        finally:
+            _QUEUE.task_done()
+
+
+def _enqueue(event_type: str, handler, fields: dict[str, str]) -> None:
+    global _worker
+    # Started lazily so it lives in the serving process, not a pre-fork parent.
+    if _worker is None or not _worker.is_alive():
+        with _worker_lock:
+            if _worker is None or not _worker.is_alive():
+                _worker = threading.Thread(target=_drain, name="webhook-worker", daemon=True)
+                _worker.start()
+    try:
+        _QUEUE.put_nowait((event_type, handler, fields))
+    except queue.Full:
+        logger.error("Webhook queue full — dropping '%s' event", event_type)
+
+
 # -----------------------------------------------------------------------
 # Endpoint
 # -----------------------------------------------------------------------
@@ -239,24 +403,32 @@ _HANDLERS = {
 @webhooks_bp.post("/webhooks/recurly")
 @_check_basic_auth
 def recurly_webhook():
-    xml_body = request.get_data()
+    # Read the raw bytes once: no copy cached on the request, no form parsing.
+    xml_body = request.get_data(cache=False, as_text=False, parse_form_data=False)
     if not xml_body:
-        return jsonify({"error": "Empty body"}), 400
+        return json_response({"error": "Empty body"}, 400)
+
+    # Ack events we don't handle without building a DOM for them. Anything
+    # the peek can't read (comments, odd encodings) falls through to a parse.
+    peeked = _peek_event_type(xml_body)
+    if peeked is not None and peeked not in _HANDLERS:
+        logger.debug("Unhandled webhook event: %s", peeked)
+        return ("", 200)
 
     try:
         event_type, root = _parse_payload(xml_body)
-    except ET.ParseError as e:
+    except _XMLError as e:
         logger.error("Failed to parse webhook XML: %s", e)
-        return jsonify({"error": "Invalid XML"}), 400
+        return json_response({"error": "Invalid XML"}, 400)
 
     handler = _HANDLERS.get(event_type)
     if handler:
         try:
-            handler(root)
+            _enqueue(event_type, handler, _extract(event_type, root))
         except Exception as e:
             # Log the error but always return 200 — otherwise Recurly will
             # keep retrying and clog the queue.
-            logger.error("Error in webhook handler for '%s': %s", event_type, e, exc_info=True)
+            logger.error("Error queueing webhook '%s': %s", event_type, e, exc_info=True)
     else:
         logger.debug("Unhandled webhook event: %s", event_type)
 
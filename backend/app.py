@@ -10,11 +10,15 @@ Run locally:
     python app.py
 
 Production (Gunicorn):
-    gunicorn -w 4 -b 0.0.0.0:5000 app:app
+    gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:5000 app:app
+
+    Threaded workers keep one slow Recurly call or webhook from tying up a
+    whole worker process. Each thread gets its own Recurly connection (see
+    utils/recurly_client.py), so this is safe to scale up.
 """
 
 import os
-from flask import Flask, jsonify
+from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 
@@ -25,11 +29,17 @@ from api.subscribe        import subscribe_bp
 from api.account          import account_bp
 from api.webhooks         import webhooks_bp
 from api.validate_coupon  import validate_coupon_bp
+from utils.json_provider  import OrjsonProvider, json_response
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-change-me")
+    app.json = OrjsonProvider(app)
+
+    # Reject oversized bodies before any route reads or parses them. Recurly
+    # notifications and checkout payloads are a few KB; 1 MB is generous.
+    app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_REQUEST_BYTES", 1_000_000))
 
     # Allow the static frontend to reach the API.
     # In production, restrict origins to your real domain.
@@ -45,20 +55,24 @@ def create_app() -> Flask:
     # ---- Health check ----
     @app.get("/health")
     def health():
-        return jsonify({"status": "ok", "service": "Flowers Forever API"})
+        return json_response({"status": "ok", "service": "Flowers Forever API"})
 
     # ---- Generic error handlers ----
     @app.errorhandler(404)
     def not_found(e):
-        return jsonify({"success": False, "message": "Endpoint not found"}), 404
+        return json_response({"success": False, "message": "Endpoint not found"}, 404)
 
     @app.errorhandler(405)
     def method_not_allowed(e):
-        return jsonify({"success": False, "message": "Method not allowed"}), 405
+        return json_response({"success": False, "message": "Method not allowed"}, 405)
+
+    @app.errorhandler(413)
+    def payload_too_large(e):
+        return json_response({"success": False, "message": "Payload too large"}, 413)
 
     @app.errorhandler(500)
     def internal_error(e):
-        return jsonify({"success": False, "message": "Internal server error"}), 500
+        return json_response({"success": False, "message": "Internal server error"}, 500)
 
     return app
 
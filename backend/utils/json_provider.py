@@ -0,0 +1,35 @@
+"""
+orjson-backed JSON provider for Flask.
+
+Installed on the app in create_app() so every jsonify() response and
+request.get_json() call goes through orjson. orjson serialises datetime
+objects itself (naive values are treated as UTC and emitted with a "Z"
+suffix), so serialisers can hand back the SDK's datetimes directly.
+"""
+
+from typing import Any
+
+import orjson
+from flask import Response, current_app
+from flask.json.provider import DefaultJSONProvider
+
+_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+class OrjsonProvider(DefaultJSONProvider):
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # Flask's indent/separators kwargs are ignored — orjson output is
+        # always compact. Types orjson can't handle (e.g. Decimal) fall back
+        # to Flask's default encoder.
+        return orjson.dumps(obj, default=self.default, option=_OPTIONS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+def json_response(obj: Any, status: int = 200) -> Response:
+    """Build a JSON response straight from orjson's bytes, skipping the
+    bytes -> str -> bytes round-trip jsonify() makes."""
+    body = orjson.dumps(obj, default=DefaultJSONProvider.default, option=_OPTIONS)
+    return current_app.response_class(body, status=status, mimetype="application/json")
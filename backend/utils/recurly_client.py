@@ -1,25 +1,73 @@
 """
 Shared Recurly client — imported by all API modules.
 Raises a clear error at startup if the API key is missing.
+
+Each recurly.Client holds one persistent HTTPS connection, and
+http.client connections must not be shared between threads. `client`
+is therefore a small pool: every worker thread gets its own Client,
+created on first use and reused by all endpoints for the life of the
+process, so requests keep reusing warm TCP/TLS connections.
 """
 
+import atexit
 import os
+import threading
+
 import recurly
 
 
-def get_client() -> recurly.Client:
+def _api_key() -> str:
     api_key = os.environ.get("RECURLY_PRIVATE_API_KEY", "")
     if not api_key or api_key == "your-private-api-key-here":
         raise RuntimeError(
             "RECURLY_PRIVATE_API_KEY is not set. "
             "Copy .env.example to .env and add your Recurly private API key."
         )
-    return recurly.Client(api_key)
+    return api_key
+
+
+def get_client() -> recurly.Client:
+    return recurly.Client(_api_key())
+
+
+class ClientPool:
+    """Thread-local pool of Recurly clients; proxies attribute access to
+    the calling thread's client."""
+
+    def __init__(self):
+        self._local   = threading.local()
+        self._lock    = threading.Lock()
+        self._clients: list[recurly.Client] = []
+
+    def _get(self) -> recurly.Client:
+        c = getattr(self._local, "client", None)
+        if c is None:
+            c = self._local.client = get_client()
+            with self._lock:
+                self._clients.append(c)
+        return c
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def close(self) -> None:
+        """Drop every pooled client so their connections are released."""
+        with self._lock:
+            self._clients.clear()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 # Module-level singleton — created once when the module is first imported.
 try:
-    client: recurly.Client = get_client()
+    _api_key()
+    client: ClientPool = ClientPool()
+    atexit.register(client.close)
 except RuntimeError as _e:
     # Allow the app to start without a key so the dev notice still shows.
     # Endpoints will fail gracefully if the key is missing.
@@ -2,11 +2,11 @@
 Input validation helpers for API request payloads.
 """
 
-import re
-from typing import Any
+import sys
+from typing import Any, Iterator
 
 # All valid plan codes defined in the Recurly Admin Console
-VALID_PLAN_CODES = {
+VALID_PLAN_CODES: frozenset[str] = frozenset(map(sys.intern, (
     "5daysub",           # Classic Bouquet — $100.00/month
     "classic-monthly",
     "premium-monthly",
@@ -17,25 +17,32 @@ VALID_PLAN_CODES = {
     "tropical-monthly",
     "petsafe-monthly",
     "plants-monthly",
-}
+)))
 
-US_STATES = {
+US_STATES: frozenset[str] = frozenset(map(sys.intern, (
     "AL","AK","AZ","AR","CA","CO","CT","DE","FL","GA",
     "HI","ID","IL","IN","IA","KS","KY","LA","ME","MD",
     "MA","MI","MN","MS","MO","MT","NE","NV","NH","NJ",
     "NM","NY","NC","ND","OH","OK","OR","PA","RI","SC",
     "SD","TN","TX","UT","VT","VA","WA","WV","WI","WY",
-}
+)))
 
 
-def _required(data: dict, *keys: str) -> list[str]:
-    """Return a list of error messages for any missing/blank required keys."""
-    errors = []
+def _valid_email(s: str) -> bool:
+    """Exactly one '@', non-empty local part, a dot inside the domain, no whitespace."""
+    at = s.find("@")
+    if at <= 0 or s.find("@", at + 1) != -1:
+        return False
+    dot = s.find(".", at + 2)
+    return dot != -1 and dot < len(s) - 1 and not any(c.isspace() for c in s)
+
+
+def _required(data: dict, *keys: str) -> Iterator[str]:
+    """Yield an error message for each missing/blank required key."""
     for key in keys:
         val = data.get(key, "")
         if not isinstance(val, str) or not val.strip():
-            errors.append(f"'{key}' is required.")
-    return errors
+            yield f"'{key}' is required."
 
 
 def validate_subscription_payload(data: Any) -> list[str]:
@@ -49,11 +56,11 @@ def validate_subscription_payload(data: Any) -> list[str]:
     errors: list[str] = []
 
     # Top-level required fields
-    errors += _required(data, "recurly_token", "plan_code", "first_name", "last_name", "email")
+    errors.extend(_required(data, "recurly_token", "plan_code", "first_name", "last_name", "email"))
 
     # Email format
     email = data.get("email", "")
-    if email and not re.match(r"^[^\s@]+@[^\s@]+\.[^\s@]+$", email):
+    if email and isinstance(email, str) and not _valid_email(email):
         errors.append("'email' is not a valid email address.")
 
     # Plan code whitelist
@@ -66,14 +73,17 @@ def validate_subscription_payload(data: Any) -> list[str]:
     if not isinstance(address, dict):
         errors.append("'address' must be an object.")
     else:
-        errors += _required(address, "address1", "city", "state", "zip")
+        errors.extend(_required(address, "address1", "city", "state", "zip"))
 
         state = address.get("state", "")
-        if state and state.upper() not in US_STATES:
+        # Most clients already send "NY"; only upper-case when needed.
+        if state and isinstance(state, str) and state not in US_STATES and state.upper() not in US_STATES:
             errors.append(f"'address.state' '{state}' is not a valid US state abbreviation.")
 
         zip_code = address.get("zip", "")
-        if zip_code and not re.match(r"^\d{5}$", str(zip_code)):
-            errors.append("'address.zip' must be a 5-digit US ZIP code.")
+        if zip_code:
+            zip_code = str(zip_code)
+            if len(zip_code) != 5 or not zip_code.isdecimal():
+                errors.append("'address.zip' must be a 5-digit US ZIP code.")
 
     return errors